@@ -4,6 +4,7 @@
 import os
 import sys
 import copy
+import functools
 from abc import ABC
 from typing import List, Dict, Any, Union, Optional
 
@@ -21,17 +22,67 @@ from aiflows.utils.general_helpers import (
     nested_keys_search,
     process_config_leafs,
     quick_load,
+    fast_deepcopy,
 )
 from aiflows.utils.rich_utils import print_config_tree
 from aiflows.flow_cache import FlowCache, CachingKey, CachingValue, CACHING_PARAMETERS
 from aiflows.utils.general_helpers import try_except_decorator
-from aiflows.utils.coflows_utils import push_to_flow, FlowFuture, dispatch_response
+from aiflows.utils.coflows_utils import (
+    push_to_flow,
+    push_to_flow_async,
+    dispatch_response,
+)
 import colink as CL
 import hydra
 
 log = logging.get_logger(__name__)
 
 
+def _make_targets_absolute(config: Dict[str, Any], cls_parent_module: str):
+    """Makes the relative `_target_`s of a config absolute (in place).
+
+    :param config: The config
+    :type config: Dict[str, Any]
+    :param cls_parent_module: The module relative `_target_`s are resolved against
+    :type cls_parent_module: str
+    """
+    process_config_leafs(
+        config,
+        lambda k, v: (
+            cls_parent_module + v if k == "_target_" and v.startswith(".") else v
+        ),
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _load_default_config_yaml(path_to_config: str, mtime: float, cls_parent_module: str):
+    """Loads a flow's default config yaml. Results are cached, so that instantiating a flow (e.g. in the dispatch
+    worker, on every task) does not parse the same yaml files again.
+
+    Interpolations (e.g. `${oc.env:...}`) can't be cached, as their value may change between calls: if the yaml
+    contains any, the unresolved config is returned and has to be resolved (and its `_target_`s made absolute)
+    by the caller. Otherwise, the config is returned with its relative `_target_`s already made absolute.
+
+    :param path_to_config: The path to the yaml file
+    :type path_to_config: str
+    :param mtime: The modification time of the yaml file (part of the cache key, so that edits are picked up)
+    :type mtime: float
+    :param cls_parent_module: The module relative `_target_`s are resolved against
+    :type cls_parent_module: str
+    :return: The default config (shared between calls, must not be mutated) and whether it has to be resolved
+    :rtype: Tuple[Dict[str, Any], bool]
+    """
+    with open(path_to_config, "r") as f:
+        has_interpolations = "${" in f.read()
+
+    if has_interpolations:
+        return OmegaConf.to_container(OmegaConf.load(path_to_config), resolve=False), True
+
+    default_config = OmegaConf.to_container(OmegaConf.load(path_to_config), resolve=True)
+    _make_targets_absolute(default_config, cls_parent_module)
+    return default_config, False
+
+
 class Flow(ABC):
     """
     Abstract class inherited by all Flows.
@@ -166,20 +217,18 @@ class Flow(ABC):
 
         path_to_config = os.path.join(path_to_flow_directory, f"{class_name}.yaml")
         if os.path.exists(path_to_config):
-            default_config = OmegaConf.to_container(
-                OmegaConf.load(path_to_config), resolve=True
-            )
-
             cls_parent_module = ".".join(cls.__module__.split(".")[:-1])
 
-            process_config_leafs(
-                default_config,
-                lambda k, v: (
-                    cls_parent_module + v
-                    if k == "_target_" and v.startswith(".")
-                    else v
-                ),
+            # the parsed yaml is cached (and invalidated when the file changes), copy it before merging
+            default_config, needs_resolving = _load_default_config_yaml(
+                path_to_config, os.path.getmtime(path_to_config), cls_parent_module
             )
+            if needs_resolving:
+                # interpolations are resolved on every call (e.g. to pick up changes of environment variables)
+                default_config = OmegaConf.to_container(OmegaConf.create(default_config), resolve=True)
+                _make_targets_absolute(default_config, cls_parent_module)
+            else:
+                default_config = fast_deepcopy(default_config)
 
             config = recursive_dictionary_update(parent_default_config, default_config)
         elif hasattr(cls, f"_{cls.__name__}__default_flow_config"):
@@ -389,7 +438,9 @@ class Flow(ABC):
         :param message: The message to log
         :type message: Message
         """
-        log.debug(message.to_string())
+        # to_string deep copies and json-formats the message, only pay for it if it is going to be logged
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug(message.to_string())
         # TODO: Think about how we want to log messages
         pass
 
@@ -448,7 +499,7 @@ class Flow(ABC):
             user_id = None
         # ~~~ Create the message ~~~
         msg = FlowMessage(
-            data=copy.deepcopy(data),
+            data=fast_deepcopy(data),
             private_keys=private_keys,
             src_flow=src_flow,
             src_flow_id=self.get_instance_id(),
@@ -473,10 +524,10 @@ class Flow(ABC):
         """
 
         if isinstance(response, FlowMessage):
-            output_data = copy.deepcopy(response.data)
+            output_data = fast_deepcopy(response.data)
 
         else:
-            output_data = copy.deepcopy(response)
+            output_data = fast_deepcopy(response)
 
         if self.cl is not None:
             user_id = self.cl.get_user_id()
@@ -700,13 +751,13 @@ class Flow(ABC):
             user_id=self.cl.get_user_id(),
         )
 
-        message_path = push_to_flow(
+        future = push_to_flow_async(
             self.cl, self.flow_config["user_id"], self.get_instance_id(), message
         )
 
         self._post_call_hook()
 
-        return FlowFuture(self.cl, message_path)
+        return future
 
     def _post_call_hook(self):
         """Removes all attributes from the namespace that are not in self.KEYS_TO_IGNORE_WHEN_RESETTING_NAMESPACE"""
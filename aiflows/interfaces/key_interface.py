@@ -1,7 +1,7 @@
-import copy
 from abc import ABC
 from typing import Dict, Any, List,Union
 from aiflows.messages import FlowMessage
+from aiflows.utils.general_helpers import fast_deepcopy
 
 import hydra
 
@@ -92,7 +92,7 @@ class KeyInterface(ABC):
         else:
             data_dict = data
         
-        data_dict = copy.deepcopy(data_dict)
+        data_dict = fast_deepcopy(data_dict)
         # print(f"src_flow: {src_flow.name}, dst_flow: {dst_flow.name}")
         for transformation in self.transformations:
             # print(f"before transformation: {transformation}, data_dict: {data_dict}")
@@ -5,7 +5,7 @@ from typing import List, Any, Dict
 import colorama
 
 from aiflows.utils.general_helpers import create_unique_id, get_current_datetime_ns
-from aiflows.utils.io_utils import coflows_deserialize, coflows_serialize
+from aiflows.utils.io_utils import coflows_deserialize, coflows_serialize, MSGPACK_ENCODE_ERRORS
 colorama.init()
 
 
@@ -35,6 +35,10 @@ class Message:
     # ~~~ Private keys that should not be serialized or logged ~~~
     private_keys: List[str]
 
+    # Messages are serialized with msgpack, falling back to pickle for the messages msgpack can't encode.
+    # Set to True to always serialize with pickle. Deserialization detects the format from the encoded bytes.
+    SERIALIZE_WITH_PICKLE = False
+
     def __init__(self, data: Dict[str, Any], created_by: str, private_keys: List[str] = None):
 
         # ~~~ Initialize message identifiers ~~~
@@ -86,12 +90,19 @@ class Message:
         return json.dumps(d, indent=4, default=str)
     
     def serialize(self):
-        """ Returns the serialized message
+        """ Returns the serialized message (msgpack, or pickle if SERIALIZE_WITH_PICKLE is set or msgpack can't
+        encode the message)
         
         :return: The serialized message
         :rtype: bytes
         """
-        return coflows_serialize(self.to_dict())
+        d = self.to_dict()
+        if not self.SERIALIZE_WITH_PICKLE:
+            try:
+                return coflows_serialize(d, use_msgpack=True)
+            except MSGPACK_ENCODE_ERRORS:
+                pass
+        return coflows_serialize(d, use_pickle=True)
 
     @classmethod
     def deserialize(cls, encoded_data: bytes):
@@ -102,15 +113,52 @@ class Message:
         :return: The deserialized message
         :rtype: Message
         """
-        d = coflows_deserialize(encoded_data)
-            
-        message_id = d.pop("message_id")
-        created_at = d.pop("created_at")
+        encoding = cls._get_encoding(encoded_data)
+        d = coflows_deserialize(
+            encoded_data, use_pickle=encoding == "pickle", use_msgpack=encoding == "msgpack"
+        )
+        return cls._from_dict(d)
+
+    @staticmethod
+    def _get_encoding(encoded_data: bytes) -> str:
+        """ Returns the format of an encoded message, detected from its first byte:
+
+        - "pickle": 0x80, the PROTO opcode that starts every pickle of protocol >= 2
+        - "json": "{", the format used by aiflows versions prior to msgpack (e.g. by peers running an older
+          version or for entries already in colink storage). In msgpack it would be a top-level integer.
+        - "msgpack": anything else (a message is a non-empty msgpack map or array, so it never starts with 0x80)
+
+        :param encoded_data: The encoded message
+        :type encoded_data: bytes
+        :return: The format of the message ("pickle", "json" or "msgpack")
+        :rtype: str
+        """
+        first_byte = encoded_data[:1] if encoded_data is not None else b""
+        if first_byte == b"\x80":
+            return "pickle"
+        if first_byte == b"{":
+            return "json"
+        return "msgpack"
+
+    @classmethod
+    def _from_dict(cls, d: Dict[str, Any]):
+        """ Builds a message from its dictionary representation (as returned by to_dict)
+
+        :param d: The dictionary representation of the message
+        :type d: Dict[str, Any]
+        :return: The message
+        :rtype: Message
+        """
+        message_id = d.pop("message_id", None)
+        created_at = d.pop("created_at", None)
         message_type = d.pop("message_type")
     
         msg = cls(**d)
-        msg.message_id = message_id
-        msg.created_at = created_at
+        # a message_id/created_at that was stripped as a private key keeps the one generated by the constructor
+        if message_id is not None:
+            msg.message_id = message_id
+        if created_at is not None:
+            msg.created_at = created_at
         assert msg.message_type == message_type,"Message type mismatch"
         return msg
 
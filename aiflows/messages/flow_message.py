@@ -1,11 +1,38 @@
 from dataclasses import dataclass
 from typing import List, Any, Dict, Optional,Union
 import colorama
+import msgspec
 from aiflows.messages import Message
-from aiflows.utils.io_utils import coflows_deserialize
+from aiflows.utils.io_utils import coflows_deserialize, coflows_serialize, MSGPACK_ENCODE_ERRORS
 colorama.init()
 
 
+class _FlowMessageStruct(msgspec.Struct, array_like=True):
+    """Wire representation of a FlowMessage. Encoded as a msgpack array (not a map) so that
+    field names are neither sent nor hashed when decoding."""
+
+    # message_id, created_at and input_message_id are None when stripped as private keys
+    message_id: Optional[str]
+    created_at: Optional[str]
+    message_type: str
+    created_by: Optional[str]
+    # keys are not restricted to str: any key msgpack can encode is delivered as is
+    data: Dict[Any, Any]
+    src_flow_id: Any
+    reply_data: Optional[Dict[Any, Any]]
+    src_flow: Any
+    dst_flow: Any
+    input_message_id: Optional[str]
+    is_reply: Optional[bool]
+    user_id: Optional[str]
+
+
+_flow_message_encoder = msgspec.msgpack.Encoder()
+_flow_message_decoder = msgspec.msgpack.Decoder(_FlowMessageStruct)
+# first byte of an encoded _FlowMessageStruct: the msgpack header of an array with one item per field (0x9c)
+_FLOW_MESSAGE_STRUCT_HEADER = bytes([0x90 | len(_FlowMessageStruct.__struct_fields__)])
+
+
 # ToDo: When logging the "\n" in the nested messages is not mapped to a new line which makes it hard to debug. Fix that.
 
 @dataclass
@@ -33,6 +60,61 @@ class FlowMessage(Message):
         self.input_message_id = self.message_id if input_message_id is None else input_message_id
         self.is_reply = is_reply
         self.user_id = user_id
+
+    def serialize(self):
+        """ Returns the serialized message (a msgpack array, or pickle if SERIALIZE_WITH_PICKLE is set or
+        msgpack can't encode the message)
+
+        :return: The serialized message
+        :rtype: bytes
+        """
+        d = self.to_dict()
+        if not self.SERIALIZE_WITH_PICKLE:
+            message = self._to_struct(d)
+            try:
+                return _flow_message_encoder.encode(message)
+            except MSGPACK_ENCODE_ERRORS:
+                pass
+        return coflows_serialize(d, use_pickle=True)
+
+    def _to_struct(self, d: Dict[str, Any]) -> _FlowMessageStruct:
+        """ Builds the wire representation of the message from its dictionary representation. Attributes stripped
+        as private keys get the default value of the constructor, and attributes that aren't FlowMessage fields
+        are not serialized.
+
+        :param d: The dictionary representation of the message (as returned by to_dict)
+        :type d: Dict[str, Any]
+        :return: The wire representation of the message
+        :rtype: _FlowMessageStruct
+        """
+        return _FlowMessageStruct(
+            message_id=d.get("message_id"),
+            created_at=d.get("created_at"),
+            message_type=d.get("message_type", self.__class__.__name__),
+            created_by=d.get("created_by"),
+            data=d["data"],
+            src_flow_id=d.get("src_flow_id", "unknown"),
+            reply_data=d.get("reply_data", {"mode": "no_reply"}),
+            src_flow=d.get("src_flow", "unknown"),
+            dst_flow=d.get("dst_flow", "unknown"),
+            input_message_id=d.get("input_message_id"),
+            is_reply=d.get("is_reply", False),
+            user_id=d.get("user_id"),
+        )
+
+    @classmethod
+    def deserialize(cls, encoded_data: bytes):
+        """ Deserializes the encoded data into a message
+
+        :param encoded_data: The encoded message
+        :type encoded_data: bytes
+        :return: The deserialized message
+        :rtype: FlowMessage
+        """
+        # messages not encoded as a _FlowMessageStruct array (pickle, json, msgpack map) go through the generic path
+        if encoded_data is None or encoded_data[:1] != _FLOW_MESSAGE_STRUCT_HEADER:
+            return super().deserialize(encoded_data)
+        return cls._from_dict(msgspec.structs.asdict(_flow_message_decoder.decode(encoded_data)))
         
     def to_string(self):
         src_flow = self.src_flow
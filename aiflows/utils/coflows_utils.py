@@ -1,4 +1,6 @@
-import uuid
+import secrets
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 
 import colink as CL
 from colink import CoLink, InstantServer, InstantRegistry
@@ -9,42 +11,98 @@ from aiflows.utils.constants import (
     COFLOWS_PATH,
     INSTANCE_METADATA_PATH,
 )
-from typing import Callable
+from typing import Callable, Dict, List, Tuple
 from aiflows.utils import logging
 
 log = logging.get_logger(__name__)
 
+# Issues the colink calls of push_to_flow_async and push_to_flow_batch in the background
+_push_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="coflows_push")
+
+# Last push task submitted by push_to_flow_async to each target flow, keyed by (user id, target user id, flow id).
+# Pushes to the same flow (sync or async) wait for it, so that the flow receives them in submission order,
+# while pushes to different flows still go through concurrently.
+_pending_pushes: Dict[Tuple[str, str, str], Future] = {}
+_pending_pushes_lock = threading.Lock()
+
 
 class FlowFuture:
     """A future object that represents a response from a flow. One can use this object to read the response from the flow."""
 
-    def __init__(self, cl, message_path):
+    def __init__(self, cl, message_path, push_task: Future = None):
         self.cl = cl
         self.colink_storage_key = f"{message_path.rpartition(':')[0]}:response"
         self.output_interface = lambda data_dict, **kwargs: data_dict
+        # set when the message was pushed asynchronously (see push_to_flow_async)
+        self.push_task = push_task
+        # the reply never changes once written, so it is only read from colink once. The encoded reply is
+        # kept (rather than the message) so that every read still returns a fresh message.
+        self._encoded_reply = None
+
+    def _wait_for_push(self):
+        """Waits for the asynchronous push of the message (if any) to be submitted,
+        raising its exception if it failed."""
+        if self.push_task is not None:
+            self.push_task.result()
+
+    def _raise_push_error(self):
+        """Raises the exception of the asynchronous push of the message (if any) if it already failed."""
+        if self.push_task is not None and self.push_task.done():
+            exception = self.push_task.exception()
+            if exception is not None:
+                raise exception
 
     def __str__(self):
         return f"FlowFuture(user_id={self.cl.get_user_id()}, colink_storage_key='{self.colink_storage_key}')"
 
+    def _read_reply(self, blocking: bool):
+        """Reads the encoded reply from the colink storage (or from the cache if it was already read).
+
+        :param blocking: whether to wait for the reply if there is none yet
+        :type blocking: bool
+        :return: The encoded reply, None if there is no reply yet (non-blocking read)
+        :rtype: bytes
+        """
+        if self._encoded_reply is None:
+            if blocking:
+                self._wait_for_push()
+                self._encoded_reply = self.cl.read_or_wait(self.colink_storage_key)
+            else:
+                # a failed push will never get a reply, don't let the caller poll forever
+                self._raise_push_error()
+                self._encoded_reply = self.cl.read_entry(self.colink_storage_key)
+        return self._encoded_reply
+
+    def _decode_message(self, encoded_message: bytes):
+        """Decodes the message read from the colink storage, None if there is no message."""
+        if encoded_message is None:
+            return None
+        return FlowMessage.deserialize(encoded_message)
+
     def try_get_message(self):
         """
         Non-blocking read, returns None if there is no response yet.
         """
-        return FlowMessage.deserialize(self.cl.read_entry(self.colink_storage_key))
+        return self._decode_message(self._read_reply(blocking=False))
 
     def try_get_data(self):
-        message = FlowMessage.deserialize(self.cl.read_entry(self.colink_storage_key))
+        """
+        Non-blocking read, returns None if there is no response yet.
+        """
+        message = self.try_get_message()
+        if message is None:
+            return None
         return message.data
 
     def get_message(self):
         """Blocking read of the future returns a message."""
-        message = FlowMessage.deserialize(self.cl.read_or_wait(self.colink_storage_key))
+        message = self._decode_message(self._read_reply(blocking=True))
         message.data = self.output_interface(message.data)
         return message
 
     def get_data(self):
         """Blocking read of the future returns a dictionary of the data."""
-        message = FlowMessage.deserialize(self.cl.read_or_wait(self.colink_storage_key))
+        message = self._decode_message(self._read_reply(blocking=True))
         return self.output_interface(message.data)
 
     def set_output_interface(self, ouput_interface: Callable):
@@ -52,31 +110,57 @@ class FlowFuture:
         self.output_interface = ouput_interface
 
 
-def push_to_flow(
-    cl: CL.colink, target_user_id: str, target_flow_id: str, message: FlowMessage
-):
-    """Pushes a message to a flow via colink
+def _get_user_id(cl: CL.CoLink) -> str:
+    """Returns the user id of the colink object. CoLink.get_user_id decodes the jwt on every call,
+    so the result is cached on the colink object (and recomputed if its jwt changes).
+
+    :param cl: The colink object
+    :type cl: CL.colink
+    :return: The user id
+    :rtype: str
+    """
+    cached = getattr(cl, "_cached_user_id", None)
+    if cached is None or cached[0] != cl.jwt:
+        cached = (cl.jwt, cl.get_user_id())
+        cl._cached_user_id = cached
+    return cached[1]
+
+
+# Participants of coflows_push tasks, keyed by (user id, target user id).
+# run_task copies them into the task, so the same lists can be reused for every push.
+_push_participants_cache: Dict[Tuple[str, str], List[CL.Participant]] = {}
+
+
+def _get_push_participants(cl: CL.CoLink, target_user_id: str):
+    """Returns the participants of a coflows_push task to the given user
 
     :param cl: The colink object
     :type cl: CL.colink
     :param target_user_id: The user id of the flow we're pushing to
     :type target_user_id: str
-    :param target_flow_id: The flow id of the flow we're pushing to
-    :type target_flow_id: str
-    :param message: The message to push
-    :type message: FlowMessage
+    :return: The participants of the push task
+    :rtype: List[CL.Participant]
     """
-    if target_user_id == "local" or target_user_id == cl.get_user_id():
+    user_id = _get_user_id(cl)
+    if target_user_id == "local":
+        target_user_id = user_id
+
+    cache_key = (user_id, target_user_id)
+    participants = _push_participants_cache.get(cache_key)
+    if participants is not None:
+        return participants
+
+    if target_user_id == user_id:
         participants = [
             CL.Participant(
-                user_id=cl.get_user_id(),
+                user_id=user_id,
                 role="receiver",
             ),
         ]
     else:
         participants = [
             CL.Participant(
-                user_id=cl.get_user_id(),
+                user_id=user_id,
                 role="initiator",
             ),
             CL.Participant(
@@ -85,19 +169,197 @@ def push_to_flow(
             ),
         ]
 
-    push_msg_id = uuid.uuid4()
+    _push_participants_cache[cache_key] = participants
+    return participants
+
+
+def push_to_flow(
+    cl: CL.colink, target_user_id: str, target_flow_id: str, message: FlowMessage
+):
+    """Pushes a message to a flow via colink
+
+    :param cl: The colink object
+    :type cl: CL.colink
+    :param target_user_id: The user id of the flow we're pushing to
+    :type target_user_id: str
+    :param target_flow_id: The flow id of the flow we're pushing to
+    :type target_flow_id: str
+    :param message: The message to push
+    :type message: FlowMessage
+    """
+    participants = _get_push_participants(cl, target_user_id)
+    push_msg_path = _create_push_entry(cl, message)
+    _wait_for_pending_push(_get_push_key(cl, target_user_id, target_flow_id))
+    _run_push_task(cl, participants, target_flow_id, push_msg_path)
+    return push_msg_path
+
+
+def push_to_flow_batch(
+    cl: CL.colink,
+    target_user_id: str,
+    target_flow_id: str,
+    messages: List[FlowMessage],
+    ordered: bool = True,
+) -> List[str]:
+    """Pushes several messages to a flow via colink. The messages are stored concurrently (one colink call per
+    message, issued from a thread pool). The push tasks are then submitted one after the other, so that the flow
+    receives the messages in order, or concurrently as well if ordered is False.
+
+    :param cl: The colink object
+    :type cl: CL.colink
+    :param target_user_id: The user id of the flow we're pushing to
+    :type target_user_id: str
+    :param target_flow_id: The flow id of the flow we're pushing to
+    :type target_flow_id: str
+    :param messages: The messages to push
+    :type messages: List[FlowMessage]
+    :param ordered: whether the flow must receive the messages in the order given (default is True)
+    :type ordered: bool
+    :return: The colink storage paths of the pushed messages
+    :rtype: List[str]
+    """
+    participants = _get_push_participants(cl, target_user_id)
+    push_msg_paths = list(
+        _push_executor.map(lambda message: _create_push_entry(cl, message), messages)
+    )
+
+    _wait_for_pending_push(_get_push_key(cl, target_user_id, target_flow_id))
+    if ordered:
+        for push_msg_path in push_msg_paths:
+            _run_push_task(cl, participants, target_flow_id, push_msg_path)
+    else:
+        # consume the iterator so that errors are raised
+        list(
+            _push_executor.map(
+                lambda push_msg_path: _run_push_task(cl, participants, target_flow_id, push_msg_path),
+                push_msg_paths,
+            )
+        )
+
+    return push_msg_paths
+
+
+def push_to_flow_async(
+    cl: CL.colink, target_user_id: str, target_flow_id: str, message: FlowMessage
+) -> FlowFuture:
+    """Pushes a message to a flow via colink without waiting for the push task to be submitted.
+    The message is stored right away, while the coflows_push task is submitted by a background thread.
+    Pushes to the same flow (through push_to_flow, push_to_flow_batch or push_to_flow_async) are still
+    submitted in the order they were issued. The reply can be read from the returned future
+    (if the message's reply_data mode is "storage"), which also raises the error of the push if it failed.
+
+    :param cl: The colink object
+    :type cl: CL.colink
+    :param target_user_id: The user id of the flow we're pushing to
+    :type target_user_id: str
+    :param target_flow_id: The flow id of the flow we're pushing to
+    :type target_flow_id: str
+    :param message: The message to push
+    :type message: FlowMessage
+    :return: The future that will contain the reply
+    :rtype: FlowFuture
+    """
+    participants = _get_push_participants(cl, target_user_id)
+    push_msg_path = _create_push_entry(cl, message)
+    push_key = _get_push_key(cl, target_user_id, target_flow_id)
+
+    with _pending_pushes_lock:
+        previous_push_task = _pending_pushes.get(push_key)
+        push_task = _push_executor.submit(
+            _run_push_task_after,
+            previous_push_task,
+            cl,
+            participants,
+            target_flow_id,
+            push_msg_path,
+        )
+        _pending_pushes[push_key] = push_task
+
+    push_task.add_done_callback(
+        lambda task: _on_push_task_done(push_key, push_msg_path, task)
+    )
+    return FlowFuture(cl, push_msg_path, push_task=push_task)
+
+
+def _get_push_key(cl: CL.colink, target_user_id: str, target_flow_id: str) -> Tuple[str, str, str]:
+    """Returns the key identifying the target flow of a push in _pending_pushes"""
+    user_id = _get_user_id(cl)
+    if target_user_id == "local":
+        target_user_id = user_id
+    return (user_id, target_user_id, target_flow_id)
+
+
+def _wait_for_pending_push(push_key: Tuple[str, str, str]):
+    """Waits until the last asynchronous push to the target flow (if any) was submitted"""
+    with _pending_pushes_lock:
+        pending_push_task = _pending_pushes.get(push_key)
+    if pending_push_task is not None:
+        # its error (if any) is raised by its own future, not by the pushes that follow it
+        wait([pending_push_task])
+
+
+def _run_push_task_after(previous_push_task: Future, *args):
+    """Runs _run_push_task(*args) once the previous push to the same flow was submitted.
+    NOTE the executor starts tasks in submission order, so the previous task is already running (or done)."""
+    if previous_push_task is not None:
+        wait([previous_push_task])
+    _run_push_task(*args)
+
+
+def _on_push_task_done(push_key: Tuple[str, str, str], push_msg_path: str, push_task: Future):
+    """Logs the error of a failed asynchronous push and forgets the push once it is done"""
+    exception = push_task.exception()
+    if exception is not None:
+        log.error(f"Failed to push message {push_msg_path}: {exception!r}")
+
+    with _pending_pushes_lock:
+        if _pending_pushes.get(push_key) is push_task:
+            del _pending_pushes[push_key]
+
+
+def _create_push_entry(cl: CL.colink, message: FlowMessage) -> str:
+    """Stores a message to push in colink storage
+
+    :param cl: The colink object
+    :type cl: CL.colink
+    :param message: The message to store
+    :type message: FlowMessage
+    :return: The colink storage path of the message
+    :rtype: str
+    """
+    # random hex id, no need to build (and format) a UUID object
+    push_msg_id = secrets.token_hex(16)
     push_msg_path = f"{PUSH_ARGS_TRANSFER_PATH}:{push_msg_id}:msg"
     cl.create_entry(
         push_msg_path,
         message.serialize(),
     )
+    return push_msg_path
+
+
+def _run_push_task(
+    cl: CL.colink,
+    participants: List[CL.Participant],
+    target_flow_id: str,
+    push_msg_path: str,
+):
+    """Submits the coflows_push task of a stored message to the scheduler
 
+    :param cl: The colink object
+    :type cl: CL.colink
+    :param participants: The participants of the push task
+    :type participants: List[CL.Participant]
+    :param target_flow_id: The flow id of the flow we're pushing to
+    :type target_flow_id: str
+    :param push_msg_path: The colink storage path of the message to push
+    :type push_msg_path: str
+    """
+    # NOTE the scheduler only accepts one message per coflows_push task
     push_param = {  # NOTE scheduler reads this
         "flow_id": target_flow_id,
         "message_id": push_msg_path,  # TODO return back to just id, need to change push worker
     }
     cl.run_task("coflows_push", coflows_serialize(push_param), participants, True)
-    return push_msg_path
 
 
 def dispatch_response(cl, output_message, reply_data):
@@ -133,20 +395,11 @@ def dispatch_response(cl, output_message, reply_data):
         message_path = reply_data["input_msg_path"]
         colink_storage_key = f"{message_path.rpartition(':')[0]}:response"
 
-        if user_id == cl.get_user_id():
+        if user_id == _get_user_id(cl):
             # local
             cl.update_entry(colink_storage_key, output_message.serialize())
         else:
-            participants = [
-                CL.Participant(
-                    user_id=cl.get_user_id(),
-                    role="initiator",
-                ),
-                CL.Participant(
-                    user_id=reply_data["user_id"],
-                    role="receiver",
-                ),
-            ]
+            participants = _get_push_participants(cl, user_id)
             cl.update_entry(
                 colink_storage_key,
                 output_message.serialize(),
@@ -1,4 +1,5 @@
 import collections
+import copy
 from pathlib import Path
 from typing import List, Any, Tuple, Dict, Callable, Union
 import uuid
@@ -254,6 +255,42 @@ def create_unique_id(existing_ids: List[str] = None):
             return unique_id
 
 
+_ATOMIC_TYPES = (str, int, float, bool, bytes, type(None))
+
+
+def fast_deepcopy(obj: Any, memo: Dict[int, Any] = None) -> Any:
+    """Deep copies JSON-like data (nested dicts and lists of primitives) without going through the
+    __reduce_ex__ machinery of copy.deepcopy. Any other type is copied with copy.deepcopy. As with copy.deepcopy,
+    shared sub-objects stay shared in the copy and circular references are preserved.
+
+    :param obj: The object to copy
+    :type obj: Any
+    :param memo: The memo dictionary of the objects already copied (keyed by id), shared with copy.deepcopy
+    :type memo: Dict[int, Any], optional
+    :return: A deep copy of the object
+    :rtype: Any
+    """
+    cls = type(obj)
+    if cls in _ATOMIC_TYPES:
+        return obj
+    if memo is None:
+        memo = {}
+    copied = memo.get(id(obj), memo)
+    if copied is not memo:
+        return copied
+    if cls is dict:
+        copied = memo[id(obj)] = {}
+        for key, value in obj.items():
+            copied[key] = fast_deepcopy(value, memo)
+        return copied
+    if cls is list:
+        copied = memo[id(obj)] = []
+        for item in obj:
+            copied.append(fast_deepcopy(item, memo))
+        return copied
+    return copy.deepcopy(obj, memo)
+
+
 def get_current_datetime_ns():
     """Returns the current datetime in nanoseconds.
 
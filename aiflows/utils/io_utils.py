@@ -1,75 +1,266 @@
 import os
+import mmap
 import pickle
-import json
+import types
+import warnings
 from typing import Any
 
+import msgspec
+
+# NOTE the coflows scheduler parses some of the serialized entries (e.g. push params, instance metadata)
+# so the wire format has to stay JSON. The encoder/decoder are created once and reused across calls.
+_enc = msgspec.json.Encoder()
+_dec = msgspec.json.Decoder()
+
+# Entries that are only ever read back by aiflows (e.g. messages) can use the more compact msgpack format.
+_msgpack_enc = msgspec.msgpack.Encoder()
+_msgpack_dec = msgspec.msgpack.Decoder()
+# errors raised by msgspec for data that msgpack can't encode (unsupported types, out of range integers, ...)
+MSGPACK_ENCODE_ERRORS = (TypeError, OverflowError, msgspec.EncodeError)
+
+CHECKPOINT_FORMATS = ("auto", "pickle", "json", "msgpack")
+
+
+_UTF8_BOM = b"\xef\xbb\xbf"
+_JSON_WHITESPACE = b" \t\n\r"
+
+
+def _checkpoint_formats_to_try(buffer) -> tuple:
+    """Guesses the format of a checkpoint from its first (non-whitespace) byte and returns the formats
+    to try, most likely first.
+
+    :param buffer: The content of the checkpoint
+    :type buffer: bytes-like
+    :return: The formats to try decoding the checkpoint with ("pickle", "json" and/or "msgpack")
+    :rtype: Tuple[str]
+    """
+    # PROTO opcode, starts every pickle of protocol >= 2 (but also the msgpack encoding of an empty map)
+    if buffer[:1] == b"\x80":
+        return ("pickle", "msgpack")
+
+    start = len(_UTF8_BOM) if buffer[: len(_UTF8_BOM)] == _UTF8_BOM else 0
+    # only a bounded prefix is inspected, to not copy the whole (memory-mapped) file
+    first_byte = buffer[start : start + 4096].lstrip(_JSON_WHITESPACE)[:1]
+
+    # text content (json, but also pickles of protocol 0 and 1): a json scalar such as "1" would also be valid msgpack
+    if start > 0 or first_byte == b"" or 0x20 <= first_byte[0] <= 0x7E:
+        return ("json", "msgpack", "pickle")
+    return ("msgpack", "json", "pickle")
+
+
+def _decode_checkpoint(buffer, fmt: str) -> Any:
+    """Decodes the content of a checkpoint in the given format.
+
+    :param buffer: The content of the checkpoint
+    :type buffer: bytes-like
+    :param fmt: The format of the checkpoint ("pickle", "json" or "msgpack")
+    :type fmt: str
+    :return: The data loaded from the checkpoint
+    :rtype: Any
+    """
+    if fmt == "json":
+        if buffer[: len(_UTF8_BOM)] == _UTF8_BOM:
+            return msgspec.json.decode(buffer[len(_UTF8_BOM) :])
+        return msgspec.json.decode(buffer)
+    if fmt == "msgpack":
+        return msgspec.msgpack.decode(buffer)
+    return pickle.loads(buffer)
+
+
+def load_checkpoint(checkpoint_path: str, fmt: str = "auto"):
+    """Loads data from a checkpoint file. The file is memory-mapped rather than read into memory.
+
+    :param checkpoint_path: The path to the checkpoint file
+    :type checkpoint_path: str
+    :param fmt: The format of the checkpoint, one of "auto", "pickle", "json" or "msgpack" (default is "auto").
+        With "auto", the formats are tried in the order suggested by the first bytes of the file.
+    :type fmt: str
+    :return: The data loaded from the checkpoint file
+    :rtype: Any
+    """
+    if fmt not in CHECKPOINT_FORMATS:
+        raise ValueError(f"Unknown checkpoint format {fmt}. Supported formats: {CHECKPOINT_FORMATS}")
+
+    # Check if the provided path is valid
+    if not os.path.isfile(checkpoint_path):
+        raise FileNotFoundError(f"Checkpoint file not found at {checkpoint_path}")
+
+    with open(checkpoint_path, "rb") as file:
+        # empty files can't be memory-mapped (pickle raises the usual EOFError)
+        if os.fstat(file.fileno()).st_size == 0:
+            return pickle.load(file)
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            if fmt != "auto":
+                return _decode_checkpoint(buffer, fmt)
+
+            formats_to_try = _checkpoint_formats_to_try(buffer)
+            errors = []
+            for candidate_fmt in formats_to_try:
+                try:
+                    return _decode_checkpoint(buffer, candidate_fmt)
+                except Exception as e:
+                    errors.append(f"{candidate_fmt}: {e!r}")
+
+    raise ValueError(
+        f"Could not load checkpoint {checkpoint_path} as any of {formats_to_try}. Errors: {'; '.join(errors)}"
+    )
+
 
 def load_pickle(pickle_path: str):
-    """Loads data from a pickle file.
+    """Loads data from a checkpoint file.
+
+    .. deprecated::
+        Use :func:`load_checkpoint` instead, which also supports json and msgpack checkpoints.
 
-    :param pickle_path: The path to the pickle file
+    :param pickle_path: The path to the checkpoint file
     :type pickle_path: str
-    :return: The data loaded from the pickle file
+    :return: The data loaded from the checkpoint file
     :rtype: Any
     """
-    # Check if the provided path is valid
-    if not os.path.isfile(pickle_path):
-        raise FileNotFoundError(f"Checkpoint file not found at {pickle_path}")
+    warnings.warn(
+        "load_pickle is deprecated, use load_checkpoint instead.",
+        DeprecationWarning,
+        stacklevel=2,
+    )
+    return load_checkpoint(pickle_path, fmt="auto")
+
+
+# Maps container types to the type of their serialized counterpart (tuples are serialized as lists)
+_JSON_CONTAINER_TYPES = {list: list, tuple: list, dict: dict}
+
+
+def _json_container_type(obj):
+    """Returns the serialized container type of obj (list or dict), or None if obj is not a container."""
+    container_type = _JSON_CONTAINER_TYPES.get(type(obj))
+    if container_type is not None:
+        return container_type
+    # subclasses (e.g. OrderedDict, namedtuple) are rare, so they are only checked once the exact lookup fails
+    if isinstance(obj, (list, tuple)):
+        return list
+    if isinstance(obj, dict):
+        return dict
+    return None
+
 
-    # Load data from the checkpoint file using pickle
-    with open(pickle_path, "rb") as file:
-        data = pickle.load(file)
+# Caches, per type, whether instances have a to_json method: True/False if the type decides it,
+# None if it depends on the instance (instance attributes or __getattr__), avoiding a hasattr lookup on most leaves
+_HAS_TO_JSON = {}
+_UNKNOWN = object()
 
-    return data
+
+def _type_has_to_json(cls):
+    """Returns True/False if cls decides whether its instances have a to_json method, None otherwise."""
+    if hasattr(cls, "to_json"):
+        return True
+    # without an instance __dict__ or a python-level attribute lookup (e.g. str, int, float),
+    # instances can't have a to_json of their own
+    if (
+        cls.__dictoffset__ == 0
+        and not hasattr(cls, "__getattr__")
+        and isinstance(cls.__getattribute__, types.WrapperDescriptorType)
+    ):
+        return False
+    return None
+
+
+def _has_to_json(obj) -> bool:
+    """Returns True if obj has a to_json method (same result as hasattr(obj, "to_json"))."""
+    cls = type(obj)
+    has_to_json = _HAS_TO_JSON.get(cls, _UNKNOWN)
+    if has_to_json is _UNKNOWN:
+        has_to_json = _HAS_TO_JSON[cls] = _type_has_to_json(cls)
+    if has_to_json is None:
+        return hasattr(obj, "to_json")
+    return has_to_json
+
+
+_LEAVE_CONTAINER = object()
 
 
 def recursive_json_serialize(obj):
     """Recursively serializes an object to json.
 
+    The object tree is walked with an explicit stack (instead of recursive calls), each serialized
+    child being slotted into its pre-allocated parent container.
+
     :param obj: The object to serialize
     :type obj: Any
     :return: The serialized object
     :rtype: Any
+    :raises ValueError: If the object contains a circular reference
     """
-    if isinstance(obj, (list, tuple)):
-        return [recursive_json_serialize(item) for item in obj]
-    elif isinstance(obj, dict):
-        return {key: recursive_json_serialize(value) for key, value in obj.items()}
-    elif hasattr(obj, "to_json"):
-        return recursive_json_serialize(obj.to_json())
-    else:
-        return obj
+    root = [None]
+    stack = [(obj, root, 0)]
+    # ids of the containers on the path from the root to the current item
+    on_path = set()
+    while stack:
+        item, parent, slot = stack.pop()
+        if parent is _LEAVE_CONTAINER:
+            # the container is kept referenced by the stack entry until here, so its id can't be reused meanwhile
+            on_path.discard(id(item))
+            continue
+
+        container_type = _json_container_type(item)
+        while container_type is None and _has_to_json(item):
+            item = item.to_json()
+            container_type = _json_container_type(item)
+
+        if container_type is not None:
+            if id(item) in on_path:
+                raise ValueError("circular reference")
+            on_path.add(id(item))
+            stack.append((item, _LEAVE_CONTAINER, None))
+
+        if container_type is list:
+            serialized = [None] * len(item)
+            stack.extend((child, serialized, idx) for idx, child in enumerate(item))
+        elif container_type is dict:
+            serialized = dict.fromkeys(item)
+            stack.extend((value, serialized, key) for key, value in item.items())
+        else:
+            serialized = item
+
+        parent[slot] = serialized
+
+    return root[0]
 
 
-def coflows_serialize(data: Any, use_pickle=False) -> bytes:
+def coflows_serialize(data: Any, use_pickle=False, use_msgpack=False) -> bytes:
     """ Serializes the given data.
     
     :param data: data to serialize
     :type data: Any
     :param use_pickle: whether to use pickle for serialization (default is False)
     :type use_pickle: bool
+    :param use_msgpack: whether to use msgpack instead of json for serialization (default is False)
+    :type use_msgpack: bool
     """
     if use_pickle:
         return pickle.dumps(data)
+    if use_msgpack:
+        return _msgpack_enc.encode(data)
 
-    json_str = json.dumps(data)
-    return json_str.encode("utf-8")
+    return _enc.encode(data)
 
 
-def coflows_deserialize(encoded_data: bytes, use_pickle=False) -> Any:
+def coflows_deserialize(encoded_data: bytes, use_pickle=False, use_msgpack=False) -> Any:
     """ Deserializes the given data.
     
     :param encoded_data: data to deserialize
     :type encoded_data: bytes
     :param use_pickle: whether to use pickle for deserialization (default is False)
     :type use_pickle: bool
+    :param use_msgpack: whether the data was serialized with msgpack instead of json (default is False)
+    :type use_msgpack: bool
     """
     if encoded_data is None:
         return None
     if use_pickle:
         return pickle.loads(encoded_data)
     try:
-        json_str = encoded_data.decode("utf-8")
-        return json.loads(json_str)
-    except (json.JSONDecodeError, UnicodeDecodeError):
+        if use_msgpack:
+            return _msgpack_dec.decode(encoded_data)
+        return _dec.decode(encoded_data)
+    except msgspec.DecodeError:
         return encoded_data